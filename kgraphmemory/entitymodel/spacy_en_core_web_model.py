@@ -40,11 +40,15 @@ class SpacyEnCoreWebEntityType(Enum):
 
     @classmethod
     def get_by_label(cls, label):
-        for item in cls:
-            if item.value.label == label:
-                return item
-        raise ValueError(f"No entity type found with label: {label}")
+        item = _ENTITY_TYPE_BY_LABEL.get(label)
+        if item is None:
+            raise ValueError(f"No entity type found with label: {label}")
+        return item
 
     @classmethod
     def list_all(cls):
-        return list(cls)
\ No newline at end of file
+        return list(cls)
+
+
+# label lookup table, built once rather than scanning the enum per call
+_ENTITY_TYPE_BY_LABEL = {item.value.label: item for item in SpacyEnCoreWebEntityType}
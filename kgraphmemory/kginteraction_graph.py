@@ -1,3 +1,6 @@
+import logging
+from typing import Union
+
 from ai_haley_kg_domain.model.Edge_hasEntityKGFrame import Edge_hasEntityKGFrame
 from ai_haley_kg_domain.model.Edge_hasInteractionKGEntity import Edge_hasInteractionKGEntity
 from ai_haley_kg_domain.model.Edge_hasInteractionKGFrame import Edge_hasInteractionKGFrame
@@ -7,6 +10,7 @@ from ai_haley_kg_domain.model.KGEntity import KGEntity
 from ai_haley_kg_domain.model.KGFrame import KGFrame
 from ai_haley_kg_domain.model.KGInteraction import KGInteraction
 from ai_haley_kg_domain.model.KGSlot import KGSlot
+from vital_ai_vitalsigns.model.properties.URIProperty import URIProperty
 from vital_ai_vitalsigns.query.result_element import ResultElement
 from vital_ai_vitalsigns.query.result_list import ResultList
 
@@ -16,6 +20,32 @@ from kgraphmemory.kgresult_match import KGResultMatch
 from kgraphmemory.kgstatus import KGStatus
 from kgraphmemory.utils.uri_generator import URIGenerator
 
+logger = logging.getLogger(__name__)
+
+# class URIs used to restrict vector searches
+KG_ENTITY_CLASS_URI = 'http://vital.ai/ontology/haley-ai-kg#KGEntity'
+KG_FRAME_CLASS_URI = 'http://vital.ai/ontology/haley-ai-kg#KGFrame'
+
+# match key -> (result class, class URI restricting the search)
+# slots have several subclasses so slot searches are not restricted
+_SEARCH_TYPES = {
+    'entity': (KGEntity, KG_ENTITY_CLASS_URI),
+    'frame': (KGFrame, KG_FRAME_CLASS_URI),
+    'slot': (KGSlot, None),
+    'relation': (Edge_hasKGRelation, None),
+}
+
+
+# accepts a URI string (including str subclasses such as URIRef),
+# a graph object with a URI, or a URI property value
+def _resolve_uri(ref) -> str:
+    if isinstance(ref, (str, URIProperty)):
+        return str(ref)
+    uri = getattr(ref, 'URI', None)
+    if uri is None:
+        raise TypeError("Reference must be a URI string or a graph object with a URI.")
+    return str(uri)
+
 
 class KGInteractionGraph(KGraph):
     def __init__(self, interaction: KGInteraction):
@@ -32,47 +62,38 @@ class KGInteractionGraph(KGraph):
     def get_messages(self) -> ResultList:
         pass
 
-    def search_entities(self, entity_type: str) -> KGResultList:
+    def search_entities(self, entity_type: str, candidate_limit: int = 1000) -> KGResultList:
         interaction_uri = str(self._interaction.URI)
-        result_list = KGResultList()
-        print('InteractionURI: ' + interaction_uri)
-        nodes = self.graph.get_nodes_outgoing(interaction_uri)
-        entities = [node for node in nodes if isinstance(node, KGEntity)]
-        # TODO push filter into search
-        print('Searching entities...')
-        results = self.graph.search(entity_type, 'http://vital.ai/ontology/haley-ai-kg#KGEntity', 1000)
-        print('Searching entities...done.')
-        for r in results:
-            go = r.graph_object
-            print(f"Entity Name: {go.name}")
-            go_score = r.score
-            if isinstance(go, KGEntity):
-                if go in entities:
-                    match = KGResultMatch(go_score)
-                    match.add_match("entity", go)
-                    result_list.add_result(match)
+        logger.debug('InteractionURI: %s', interaction_uri)
+        nodes = self._get_nodes_outgoing(interaction_uri)
+        entity_uris = {str(node.URI) for node in nodes if isinstance(node, KGEntity)}
+        logger.debug('Searching entities...')
+        result_list = self._search_matches('entity', entity_type, entity_uris, candidate_limit)
+        logger.debug('Searching entities...done.')
         return result_list
 
-    def search_entity_frames(
+    # search_entity_frames(entity_uri, frame_type) searches a single entity
+    def search_entity_type_frames(
             self,
             entity_type: str,
-            frame_type: str) -> KGResultList:
+            frame_type: str,
+            candidate_limit: int = 1000) -> KGResultList:
 
         result_list = KGResultList()
 
-        entity_result_list = self.search_entities(entity_type)
+        entity_result_list = self.search_entities(entity_type, candidate_limit)
 
         if len(entity_result_list) > 0:
             entity_match = entity_result_list[0]
-            entity = entity_match['entity']
+            entity = entity_match.matches['entity']
             entity_uri = entity.URI
 
-            print('Searching entity frames...')
-            frame_result_list = self.search_entity_frames(entity_uri, frame_type)
+            logger.debug('Searching entity frames...')
+            frame_result_list = self.search_entity_frames(entity_uri, frame_type, candidate_limit)
 
             if len(frame_result_list) > 0:
                 frame_match = frame_result_list[0]
-                frame = frame_match['frame']
+                frame = frame_match.matches['frame']
 
                 result_match = KGResultMatch()
 
@@ -87,36 +108,43 @@ class KGInteractionGraph(KGraph):
             self,
             entity_type: str,
             frame_type: str,
-            slot_type: str) -> KGResultList:
+            slot_type: str,
+            candidate_limit: int = 1000) -> KGResultList:
 
         result_list = KGResultList()
 
-        print('Searching entities...')
-        entity_result_list = self.search_entities(entity_type)
+        logger.debug('Searching entities...')
+        entity_result_list = self.search_entities(entity_type, candidate_limit)
 
         if len(entity_result_list) > 0:
 
+            # the frame and slot searches do not depend on the entity,
+            # so run each once and match results against adjacent nodes.
+            # candidate_limit caps the entity, frame and slot searches separately
+            logger.debug('Searching entity frames...')
+            frame_results = self.graph.search(frame_type, KG_FRAME_CLASS_URI, candidate_limit)
+            frames = [r.graph_object for r in frame_results if isinstance(r.graph_object, KGFrame)]
+
+            logger.debug('Searching entity frame slots...')
+            slot_results = self.graph.search(slot_type, None, candidate_limit)
+            slots = [r.graph_object for r in slot_results if isinstance(r.graph_object, KGSlot)]
+
             for entity_match in entity_result_list:
-                # entity_match = entity_result_list[0]
                 entity = entity_match.matches['entity']
                 entity_uri = entity.URI
 
-                print('Searching entity frames...')
-                frame_result_list = self.search_entity_frames(entity_uri, frame_type)
+                entity_nodes = self._get_nodes_outgoing(entity_uri)
+                entity_frame_uris = {str(node.URI) for node in entity_nodes if isinstance(node, KGFrame)}
+                frame = next((f for f in frames if str(f.URI) in entity_frame_uris), None)
 
-                if len(frame_result_list) > 0:
-                    frame_match = frame_result_list[0]
-                    frame = frame_match.matches['frame']
+                if frame is not None:
                     frame_uri = frame.URI
 
-                    print('Searching entity frame slots...')
-                    slot_result_list = self.search_frame_slots(frame_uri, slot_type)
-
-                    if len(slot_result_list) > 0:
-                        slot_match = slot_result_list[0]
-                        slot = slot_match.matches['slot']
-                        slot_uri = slot.URI
+                    frame_nodes = self._get_nodes_outgoing(str(frame_uri))
+                    frame_slot_uris = {str(node.URI) for node in frame_nodes if isinstance(node, KGSlot)}
+                    slot = next((s for s in slots if str(s.URI) in frame_slot_uris), None)
 
+                    if slot is not None:
                         result_match = KGResultMatch()
 
                         result_match.add_match('entity', entity)
@@ -141,23 +169,9 @@ class KGInteractionGraph(KGraph):
                 result_list.add_result(g)
         return result_list
 
-    def search_relations(self, relation_type: str) -> KGResultList:
-        result_list = KGResultList()
-
-        relations = [edge for edge in self.graph if isinstance(edge, Edge_hasKGRelation)]
-
-        results = self.graph.search(relation_type, None, 1000)
-
-        for r in results:
-            go = r.graph_object
-            go_score = r.score
-            if isinstance(go, Edge_hasKGRelation):
-                if go in relations:
-                    match = KGResultMatch(go_score)
-                    match.add_match("relation", go)
-                    result_list.add_result(match)
-
-        return result_list
+    def search_relations(self, relation_type: str, candidate_limit: int = 1000) -> KGResultList:
+        # every relation edge in the graph qualifies, so only the type is checked
+        return self._search_matches('relation', relation_type, None, candidate_limit)
 
     def get_entity_relations(
             self,
@@ -168,125 +182,94 @@ class KGInteractionGraph(KGraph):
         result_list = ResultList()
 
         if include_source:
-            in_edges = self.graph.get_edges_incoming(entity_uri)
-            rel_in_edges = [edge for edge in in_edges if isinstance(edge, Edge_hasKGRelation)]
-            for r in rel_in_edges:
-                result_list.add_result(r)
+            for edge in self.graph.get_edges_incoming(entity_uri):
+                if isinstance(edge, Edge_hasKGRelation):
+                    result_list.add_result(edge)
 
         if include_destination:
-            out_edges = self.graph.get_edges_outgoing(entity_uri)
-            rel_out_edges = [edge for edge in out_edges if isinstance(edge, Edge_hasKGRelation)]
-            for r in rel_out_edges:
-                result_list.add_result(r)
+            for edge in self.graph.get_edges_outgoing(entity_uri):
+                if isinstance(edge, Edge_hasKGRelation):
+                    result_list.add_result(edge)
 
         return result_list
 
     def search_entity_relations(
             self,
             entity_uri,
-            relation_type: str) -> KGResultList:
-        result_list = KGResultList()
+            relation_type: str,
+            candidate_limit: int = 1000) -> KGResultList:
         in_edges = self.graph.get_edges_incoming(entity_uri)
         out_edges = self.graph.get_edges_outgoing(entity_uri)
-        rel_out_edges = [edge for edge in out_edges if isinstance(edge, Edge_hasKGRelation)]
-        rel_in_edges = [edge for edge in in_edges if isinstance(edge, Edge_hasKGRelation)]
-        edges = rel_out_edges + rel_in_edges
-        # TODO push filter into search
-        results = self.graph.search(relation_type, None, 1000)
-        for r in results:
-            go = r.graph_object
-            go_score = r.score
-            if isinstance(go, Edge_hasKGRelation):
-                if go in edges:
-                    match = KGResultMatch(go_score)
-                    match.add_match("relation", go)
-                    result_list.add_result(match)
-        return result_list
+        edge_uris = {str(edge.URI) for edge in out_edges if isinstance(edge, Edge_hasKGRelation)}
+        edge_uris.update(str(edge.URI) for edge in in_edges if isinstance(edge, Edge_hasKGRelation))
+        return self._search_matches('relation', relation_type, edge_uris, candidate_limit)
 
     def get_frames(self) -> ResultList:
         interaction_uri = str(self._interaction.URI)
-        nodes = self.graph.get_nodes_outgoing(interaction_uri)
-        frames = [node for node in nodes if isinstance(node, KGFrame)]
         result_list = ResultList()
-        for f in frames:
-            result_list.add_result(f)
+        for node in self._get_nodes_outgoing(interaction_uri):
+            if isinstance(node, KGFrame):
+                result_list.add_result(node)
         return result_list
 
-    def search_frames(self, frame_type: str) -> KGResultList:
+    def search_frames(self, frame_type: str, candidate_limit: int = 1000) -> KGResultList:
         interaction_uri = self._interaction.URI
-        result_list = KGResultList()
-        nodes = self.graph.get_nodes_outgoing(interaction_uri)
-        frames = [node for node in nodes if isinstance(node, KGFrame)]
-        # TODO push filter into search
-        results = self.graph.search(frame_type, 'http://vital.ai/ontology/haley-ai-kg#KGFrame', 1000)
-        for r in results:
-            go = r.graph_object
-            go_score = r.score
-            if isinstance(go, KGFrame):
-                if go in frames:
-                    match = KGResultMatch(go_score)
-                    match.add_match("frame", go)
-                    result_list.add_result(match)
-        return result_list
+        nodes = self._get_nodes_outgoing(interaction_uri)
+        frame_uris = {str(node.URI) for node in nodes if isinstance(node, KGFrame)}
+        return self._search_matches('frame', frame_type, frame_uris, candidate_limit)
 
     def get_entity_frames(self, entity_uri: str) -> ResultList:
-        entity = self.graph.get(entity_uri)
-        nodes = self.graph.get_nodes_outgoing(entity_uri)
-        frames = [node for node in nodes if isinstance(node, KGFrame)]
         result_list = ResultList()
-        for f in frames:
-            result_list.add_result(f)
+        for node in self._get_nodes_outgoing(entity_uri):
+            if isinstance(node, KGFrame):
+                result_list.add_result(node)
         return result_list
 
     def search_entity_frames(
             self,
             entity_uri: str,
-            frame_type: str) -> KGResultList:
-        result_list = KGResultList()
-        nodes = self.graph.get_nodes_outgoing(entity_uri)
-        frames = [node for node in nodes if isinstance(node, KGFrame)]
-        # TODO push filter into search
-        results = self.graph.search(frame_type, 'http://vital.ai/ontology/haley-ai-kg#KGFrame', 1000)
-        for r in results:
-            go = r.graph_object
-            go_score = r.score
-            if isinstance(go, KGFrame):
-                if go in frames:
-                    match = KGResultMatch(go_score)
-                    match.add_match("frame", go)
-                    result_list.add_result(match)
-        return result_list
+            frame_type: str,
+            candidate_limit: int = 1000) -> KGResultList:
+        nodes = self._get_nodes_outgoing(entity_uri)
+        frame_uris = {str(node.URI) for node in nodes if isinstance(node, KGFrame)}
+        return self._search_matches('frame', frame_type, frame_uris, candidate_limit)
 
     def get_frame_slots(self, frame_uri: str) -> ResultList:
-        frame = self.graph.get(frame_uri)
-        nodes = self.graph.get_nodes_outgoing(frame_uri)
-        slots = [node for node in nodes if isinstance(node, KGSlot)]
         result_list = ResultList()
-        for s in slots:
-            result_list.add_result(s)
+        for node in self._get_nodes_outgoing(frame_uri):
+            if isinstance(node, KGSlot):
+                result_list.add_result(node)
         return result_list
 
     def search_frame_slots(
             self,
             frame_uri: str,
-            slot_type: str) -> KGResultList:
+            slot_type: str,
+            candidate_limit: int = 1000) -> KGResultList:
+        nodes = self._get_nodes_outgoing(str(frame_uri))
+        slot_uris = {str(node.URI) for node in nodes if isinstance(node, KGSlot)}
+        return self._search_matches('slot', slot_type, slot_uris, candidate_limit)
+
+    # vector search for one of the _SEARCH_TYPES, keeping results whose
+    # URI is in candidate_uris (or all results of the type if None).
+    # candidate_limit caps the vector search before that filter, so fewer
+    # results than the limit may match even when more exist in the graph
+    def _search_matches(
+            self,
+            key: str,
+            query: str,
+            candidate_uris,
+            candidate_limit: int) -> KGResultList:
+        result_class, class_uri = _SEARCH_TYPES[key]
         result_list = KGResultList()
-        nodes = self.graph.get_nodes_outgoing(str(frame_uri))
-        slots = [node for node in nodes if isinstance(node, KGSlot)]
         # TODO push filter into search
-        # Must account for all types of slots in filter
-        results = self.graph.search(slot_type, None, 1000)
+        results = self.graph.search(query, class_uri, candidate_limit)
         for r in results:
             go = r.graph_object
-            go_score = r.score
-            if isinstance(go, KGSlot):
-                if go in slots:
-                    slot_name = go.name
-
-                    # print(f"SlotName: {slot_name} : {go_score}")
-
-                    match = KGResultMatch(go_score)
-                    match.add_match("slot", go)
+            if isinstance(go, result_class):
+                if candidate_uris is None or str(go.URI) in candidate_uris:
+                    match = KGResultMatch(r.score)
+                    match.add_match(key, go)
                     result_list.add_result(match)
         return result_list
 
@@ -295,57 +278,58 @@ class KGInteractionGraph(KGraph):
         return status
 
     def add_entity(self, entity) -> KGStatus:
-        interaction_uri = self._interaction.URI
-        edge = Edge_hasInteractionKGEntity()
-        edge.URI = URIGenerator.generate_uri()
-        edge.name = 'edge: ' + str(edge.URI)
-        edge.edgeSource = interaction_uri
-        edge.edgeDestination = entity.URI
-        self.graph.add_objects([entity, edge])
-        status = KGStatus()
-        return status
+        return self.add_entities([entity])
 
     def add_frame(self, frame) -> KGStatus:
-        interaction_uri = self._interaction.URI
-        edge = Edge_hasInteractionKGFrame()
-        edge.URI = URIGenerator.generate_uri()
-        edge.name = 'edge: ' + str(edge.URI)
-        edge.edgeSource = interaction_uri
-        edge.edgeDestination = frame.URI
-        self.graph.add_objects([frame, edge])
-        status = KGStatus()
-        return status
+        return self.add_frames([frame])
+
+    # adds all entities and their interaction edges with a single add_objects call
+    def add_entities(self, entities: list) -> KGStatus:
+        return self._add_linked_nodes(Edge_hasInteractionKGEntity, self._interaction.URI, entities)
+
+    # adds all frames and their interaction edges with a single add_objects call
+    def add_frames(self, frames: list) -> KGStatus:
+        return self._add_linked_nodes(Edge_hasInteractionKGFrame, self._interaction.URI, frames)
 
     # Relation is type Edge_hasKGRelation
     # top level relations must have each entity connected
     # to the interaction
     def add_relation(self, relation) -> KGStatus:
-        self.graph.add_objects([relation])
+        return self.add_relations([relation])
+
+    # adds all relations with a single add_objects call
+    def add_relations(self, relations: list) -> KGStatus:
+        if relations:
+            self._add_objects(list(relations))
         status = KGStatus()
         return status
 
-    def add_entity_frame(self, entity_uri: str, frame) -> KGStatus:
+    def add_entity_frame(self, entity_uri: Union[str, KGEntity], frame) -> KGStatus:
         # interaction must be connected to entity
-        interaction_uri = self._interaction.URI
-        edge = Edge_hasEntityKGFrame()
-        edge.URI = URIGenerator.generate_uri()
-        edge.name = 'edge: ' + str(edge.URI)
-        edge.edgeSource = entity_uri
-        edge.edgeDestination = frame.URI
-        self.graph.add_objects([frame, edge])
-        status = KGStatus()
-        return status
+        return self._add_linked_nodes(Edge_hasEntityKGFrame, _resolve_uri(entity_uri), [frame])
 
-    def add_frame_slot(self, frame_uri: str, slot) -> KGStatus:
+    def add_frame_slot(self, frame_uri: Union[str, KGFrame], slot) -> KGStatus:
         # interaction must be connected to entity, connected
         # to frame
-        interaction_uri = self._interaction.URI
-        edge = Edge_hasKGSlot()
-        edge.URI = URIGenerator.generate_uri()
-        edge.name = 'edge: ' + str(edge.URI)
-        edge.edgeSource = frame_uri
-        edge.edgeDestination = slot.URI
-        self.graph.add_objects([slot, edge])
+        return self.add_frame_slots(frame_uri, [slot])
+
+    # adds all slots and their edges with a single add_objects call
+    def add_frame_slots(self, frame_uri: Union[str, KGFrame], slots: list) -> KGStatus:
+        return self._add_linked_nodes(Edge_hasKGSlot, _resolve_uri(frame_uri), slots)
+
+    # adds nodes together with an edge of edge_class from source_uri to each
+    def _add_linked_nodes(self, edge_class, source_uri, nodes: list) -> KGStatus:
+        objects = []
+        for node in nodes:
+            edge = edge_class()
+            edge.URI = URIGenerator.generate_uri()
+            edge.name = 'edge: ' + str(edge.URI)
+            edge.edgeSource = source_uri
+            edge.edgeDestination = node.URI
+            objects.append(node)
+            objects.append(edge)
+        if objects:
+            self._add_objects(objects)
         status = KGStatus()
         return status
 
@@ -1,11 +1,65 @@
+from contextlib import contextmanager
+
 from vital_ai_vitalsigns.collection.graph_collection import GraphCollection
 
 
 class KGraph:
     def __init__(self):
-        self.graph = GraphCollection()
+        self._graph = None
+        self._batch_depth = 0
+        self._batch_objects = []
+        self._nodes_outgoing_cache = {}
+
+    # the graph collection is created on first use, so graphs
+    # that are registered but never touched stay cheap
+    @property
+    def graph(self) -> GraphCollection:
+        if self._graph is None:
+            self._graph = GraphCollection()
+        return self._graph
+
+    # defers adding objects until the outermost batch exits,
+    # objects added within a batch are not visible to queries until then.
+    # objects added in a block that raises are discarded, and the buffer
+    # is taken before writing so a failed write is not resent later
+    @contextmanager
+    def batch(self):
+        start = len(self._batch_objects)
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            del self._batch_objects[start:]
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._batch_objects:
+            objects, self._batch_objects = self._batch_objects, []
+            self._write_objects(objects)
+
+    def _add_objects(self, objects: list):
+        if self._batch_depth > 0:
+            self._batch_objects.extend(objects)
+        else:
+            self._write_objects(objects)
+
+    def _write_objects(self, objects: list):
+        self.graph.add_objects(objects)
+        self.clear_cache()
+
+    # cached adjacency, cleared on every write made through this class.
+    # writes made to self.graph directly are not seen until clear_cache()
+    def _get_nodes_outgoing(self, uri) -> list:
+        uri = str(uri)
+        nodes = self._nodes_outgoing_cache.get(uri)
+        if nodes is None:
+            nodes = self.graph.get_nodes_outgoing(uri)
+            self._nodes_outgoing_cache[uri] = nodes
+        return nodes
+
+    def clear_cache(self):
+        self._nodes_outgoing_cache.clear()
 
 
 # reference to underlying graph collection
 # with enabled rdf and vector collections
-
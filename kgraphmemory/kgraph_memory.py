@@ -1,15 +1,22 @@
+from collections import OrderedDict
+from typing import Optional
+from weakref import WeakValueDictionary
+
 from SPARQLWrapper import SPARQLWrapper
 from ai_haley_kg_domain.model.KGInteraction import KGInteraction
 from kgraphmemory.kginteraction_graph import KGInteractionGraph
 
 
 class KGraphMemoryMeta(type):
-    _instances = {}
 
+    # the instance is stored on the class itself, read via the class
+    # __dict__ so a subclass does not pick up its parent's instance
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super().__call__(*args, **kwargs)
-        return cls._instances[cls]
+        instance = cls.__dict__.get('_instance')
+        if instance is None:
+            instance = super().__call__(*args, **kwargs)
+            cls._instance = instance
+        return instance
 
 # types have descriptions which are used in instances
 # of objects using that type
@@ -23,9 +30,20 @@ class KGraphMemoryMeta(type):
 class KGraphMemory(metaclass=KGraphMemoryMeta):
 
     def __init__(self):
-        self._graph_map = {}
+        # unbounded unless a limit is set with set_max_graphs
+        self._graph_map = OrderedDict()
+        self._max_graphs = None
+        # evicted graphs remain available while a caller still holds them
+        self._evicted_graph_map = WeakValueDictionary()
         self._graph_database = None
 
+    # evicts least recently used graphs past max_graphs, None is unbounded
+    # evicted graphs are not persisted, so only opt in when callers keep
+    # references to graphs they still need
+    def set_max_graphs(self, max_graphs: Optional[int] = None):
+        self._max_graphs = max_graphs
+        self._evict_interaction_graphs()
+
     def set_graph_database(self, graph_database: SPARQLWrapper):
         self._graph_database = graph_database
 
@@ -56,12 +74,24 @@ class KGraphMemory(metaclass=KGraphMemoryMeta):
     def delete_slot_type(self, slot_type_uri: str):
         pass
 
+    # graphs are keyed by the URI string, the accessors below accept
+    # a URI property value as well
     def create_interaction_graph(self, interaction: KGInteraction):
-        graph_uri = interaction.URI
+        graph_uri = str(interaction.URI)
         graph = KGInteractionGraph(interaction)
+        self._evicted_graph_map.pop(graph_uri, None)
         self._graph_map[graph_uri] = graph
+        self._graph_map.move_to_end(graph_uri)
+        self._evict_interaction_graphs()
         return graph
 
+    def _evict_interaction_graphs(self):
+        if self._max_graphs is None:
+            return
+        while len(self._graph_map) > self._max_graphs:
+            graph_uri, graph = self._graph_map.popitem(last=False)
+            self._evicted_graph_map[graph_uri] = graph
+
     def serialize_interaction_graph(self, graph_uri: str):
         pass
 
@@ -113,10 +143,32 @@ class KGraphMemory(metaclass=KGraphMemoryMeta):
 
     def get_interaction_graph(self, graph_uri: str):
         # local memory, not database
-        return self._graph_map[graph_uri]
+        graph_uri = str(graph_uri)
+        graph = self._graph_map.get(graph_uri)
+        if graph is None:
+            graph = self._evicted_graph_map.pop(graph_uri)
+            self._graph_map[graph_uri] = graph
+            self._evict_interaction_graphs()
+        else:
+            self._graph_map.move_to_end(graph_uri)
+        return graph
 
     def remove_interaction_graph(self, graph_uri: str):
         # local memory, not database
-        graph = self._graph_map.pop(graph_uri)
+        graph_uri = str(graph_uri)
+        graph = self._graph_map.pop(graph_uri, None)
+        evicted_graph = self._evicted_graph_map.pop(graph_uri, None)
+        if graph is None:
+            graph = evicted_graph
+        if graph is None:
+            raise KeyError(graph_uri)
         return graph
 
+    def has_interaction_graph(self, graph_uri: str) -> bool:
+        # local memory, not database
+        # does not count as a use for eviction order
+        graph_uri = str(graph_uri)
+        return graph_uri in self._graph_map or graph_uri in self._evicted_graph_map
+
+    def __contains__(self, graph_uri: str) -> bool:
+        return self.has_interaction_graph(graph_uri)
@@ -1,3 +1,5 @@
+import heapq
+
 from kgraphmemory.kgresult_match import KGResultMatch
 
 
@@ -10,3 +12,11 @@ class KGResultList(list[KGResultMatch]):
     def get_results(self):
         # Return the entire list of KGResultMatch objects
         return self
+
+    def get_top_results(self, k: int) -> 'KGResultList':
+        # highest scoring k results, without sorting the whole list
+        # search results are already in score order, this is for lists
+        # the caller merges from several searches
+        top_list = KGResultList()
+        top_list.extend(heapq.nlargest(k, self, key=lambda result: result.score))
+        return top_list
@@ -6,6 +6,8 @@ from vital_ai_vitalsigns.model.VITAL_Node import VITAL_Node
 
 
 class KGResultMatch:
+    __slots__ = ('matches', 'score')
+
     def __init__(self, score: float = 1.0):
         self.matches: OrderedDict[str, Union[VITAL_Node, VITAL_Edge]] = OrderedDict()
         self.score = score
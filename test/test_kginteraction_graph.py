@@ -0,0 +1,232 @@
+import pytest
+
+pytest.importorskip('SPARQLWrapper')
+pytest.importorskip('ai_haley_kg_domain')
+
+from ai_haley_kg_domain.model.Edge_hasEntityKGFrame import Edge_hasEntityKGFrame
+from ai_haley_kg_domain.model.Edge_hasInteractionKGFrame import Edge_hasInteractionKGFrame
+from ai_haley_kg_domain.model.KGEntity import KGEntity
+from ai_haley_kg_domain.model.KGFrame import KGFrame
+from ai_haley_kg_domain.model.KGInteraction import KGInteraction
+from ai_haley_kg_domain.model.KGSlot import KGSlot
+
+from kgraphmemory.kginteraction_graph import KGInteractionGraph, _resolve_uri
+
+
+def make_node(node_class, uri, name):
+    node = node_class()
+    node.URI = uri
+    node.name = name
+    return node
+
+
+def make_edge(edge_class, uri, source_uri, destination_uri):
+    edge = make_node(edge_class, uri, 'edge')
+    edge.edgeSource = source_uri
+    edge.edgeDestination = destination_uri
+    return edge
+
+
+@pytest.fixture
+def graph():
+    interaction = make_node(KGInteraction, 'urn:interaction', 'interaction')
+    return KGInteractionGraph(interaction)
+
+
+def frame_uris(result_list):
+    return sorted(str(node.URI) for node in result_list)
+
+
+def match_uris(result_list):
+    return [
+        {key: str(value.URI) for key, value in result.matches.items()}
+        for result in result_list
+    ]
+
+
+def test_candidate_limit_caps_search_before_filter(graph):
+    # an entity outside the interaction matches the query first
+    graph.graph.add_objects([make_node(KGEntity, 'urn:other', 'president')])
+    graph.add_entity(make_node(KGEntity, 'urn:lincoln', 'president Lincoln'))
+
+    assert match_uris(graph.search_entities('president', candidate_limit=1)) == []
+    assert match_uris(graph.search_entities('president')) == [{'entity': 'urn:lincoln'}]
+
+
+def test_add_frame_slots_single_write(graph, monkeypatch):
+    frame = make_node(KGFrame, 'urn:frame1', 'Biography')
+    graph.add_frame(frame)
+
+    writes = []
+    add_objects = graph.graph.add_objects
+
+    def record(objects):
+        writes.append(objects)
+        add_objects(objects)
+
+    monkeypatch.setattr(graph.graph, 'add_objects', record)
+    slots = [make_node(KGSlot, f'urn:slot{i}', f'slot {i}') for i in range(3)]
+    graph.add_frame_slots(frame.URI, slots)
+
+    # each slot is written together with its edge
+    assert len(writes) == 1
+    assert len(writes[0]) == 6
+    slot_uris = sorted(str(slot.URI) for slot in graph.get_frame_slots('urn:frame1'))
+    assert slot_uris == ['urn:slot0', 'urn:slot1', 'urn:slot2']
+
+
+def test_search_entity_frame_slots(graph):
+    lincoln = make_node(KGEntity, 'urn:lincoln', 'president Lincoln')
+    washington = make_node(KGEntity, 'urn:washington', 'president Washington')
+    graph.add_entity(lincoln)
+    graph.add_entity(washington)
+
+    # the first frame found is not linked to lincoln, and has no slots
+    graph.add_entity_frame(washington.URI, make_node(KGFrame, 'urn:frame1', 'Biography'))
+    bio_frame = make_node(KGFrame, 'urn:frame2', 'Biography summary')
+    graph.add_entity_frame(lincoln.URI, bio_frame)
+    graph.add_frame_slots(bio_frame.URI, [
+        make_node(KGSlot, 'urn:slot1', 'party'),
+        make_node(KGSlot, 'urn:slot2', 'birth date'),
+    ])
+
+    result_list = graph.search_entity_frame_slots('president', 'Biography', 'birth')
+
+    assert match_uris(result_list) == [
+        {'entity': 'urn:lincoln', 'frame': 'urn:frame2', 'slot': 'urn:slot2'},
+    ]
+
+
+class UriRef(str):
+    pass
+
+
+@pytest.mark.parametrize('ref', [
+    'urn:frame1',
+    UriRef('urn:frame1'),
+    make_node(KGFrame, 'urn:frame1', 'Biography'),
+    make_node(KGFrame, 'urn:frame1', 'Biography').URI,
+])
+def test_resolve_uri(ref):
+    assert _resolve_uri(ref) == 'urn:frame1'
+    assert type(_resolve_uri(ref)) is str
+
+
+@pytest.mark.parametrize('ref', [None, 42])
+def test_resolve_uri_rejects_other_values(ref):
+    with pytest.raises(TypeError):
+        _resolve_uri(ref)
+
+
+def test_search_entity_type_frames(graph):
+    lincoln = make_node(KGEntity, 'urn:lincoln', 'president Lincoln')
+    graph.add_entity(lincoln)
+    graph.add_entity_frame(lincoln, make_node(KGFrame, 'urn:frame1', 'Biography'))
+
+    result_list = graph.search_entity_type_frames('president', 'Biography')
+
+    assert match_uris(result_list) == [{'entity': 'urn:lincoln', 'frame': 'urn:frame1'}]
+    assert match_uris(graph.search_entity_type_frames('senator', 'Biography')) == []
+
+
+def test_batch_nested_visible_after_outer_exit(graph):
+    with graph.batch():
+        graph.add_frame(make_node(KGFrame, 'urn:frame1', 'Biography'))
+        with graph.batch():
+            graph.add_frame(make_node(KGFrame, 'urn:frame2', 'Career'))
+        assert frame_uris(graph.get_frames()) == []
+    assert frame_uris(graph.get_frames()) == ['urn:frame1', 'urn:frame2']
+
+
+def test_batch_exception_discards_objects(graph):
+    with pytest.raises(ValueError):
+        with graph.batch():
+            graph.add_frame(make_node(KGFrame, 'urn:frame1', 'Biography'))
+            raise ValueError()
+    assert frame_uris(graph.get_frames()) == []
+
+    graph.add_frame(make_node(KGFrame, 'urn:frame2', 'Career'))
+    assert frame_uris(graph.get_frames()) == ['urn:frame2']
+
+
+def test_batch_nested_exception_discards_inner_objects(graph):
+    with graph.batch():
+        graph.add_frame(make_node(KGFrame, 'urn:frame1', 'Biography'))
+        with pytest.raises(ValueError):
+            with graph.batch():
+                graph.add_frame(make_node(KGFrame, 'urn:frame2', 'Career'))
+                raise ValueError()
+    assert frame_uris(graph.get_frames()) == ['urn:frame1']
+
+
+def test_batch_failed_write_is_not_resent(graph, monkeypatch):
+    writes = []
+    add_objects = graph.graph.add_objects
+
+    def fail(objects):
+        raise RuntimeError()
+
+    def record(objects):
+        writes.append(objects)
+        add_objects(objects)
+
+    monkeypatch.setattr(graph.graph, 'add_objects', fail)
+    with pytest.raises(RuntimeError):
+        with graph.batch():
+            graph.add_frame(make_node(KGFrame, 'urn:frame1', 'Biography'))
+
+    monkeypatch.setattr(graph.graph, 'add_objects', record)
+    with graph.batch():
+        graph.add_frame(make_node(KGFrame, 'urn:frame2', 'Career'))
+
+    assert len(writes) == 1
+    assert len(writes[0]) == 2
+    assert frame_uris(graph.get_frames()) == ['urn:frame2']
+
+
+def test_nodes_outgoing_cached_until_write(graph, monkeypatch):
+    lookups = []
+    get_nodes_outgoing = graph.graph.get_nodes_outgoing
+
+    def record(uri):
+        lookups.append(uri)
+        return get_nodes_outgoing(uri)
+
+    monkeypatch.setattr(graph.graph, 'get_nodes_outgoing', record)
+    graph.add_frame(make_node(KGFrame, 'urn:frame1', 'Biography'))
+    assert frame_uris(graph.get_frames()) == ['urn:frame1']
+    assert frame_uris(graph.get_frames()) == ['urn:frame1']
+    assert len(lookups) == 1
+
+    graph.add_frame(make_node(KGFrame, 'urn:frame2', 'Career'))
+    assert frame_uris(graph.get_frames()) == ['urn:frame1', 'urn:frame2']
+    assert len(lookups) == 2
+
+
+def test_direct_graph_write_needs_clear_cache(graph):
+    graph.add_frame(make_node(KGFrame, 'urn:frame1', 'Biography'))
+    assert frame_uris(graph.get_frames()) == ['urn:frame1']
+
+    # written through the public graph collection, bypassing add_frame
+    frame = make_node(KGFrame, 'urn:frame2', 'Career')
+    edge = make_edge(Edge_hasInteractionKGFrame, 'urn:edge2', 'urn:interaction', frame.URI)
+    graph.graph.add_objects([frame, edge])
+    assert frame_uris(graph.get_frames()) == ['urn:frame1']
+
+    graph.clear_cache()
+    assert frame_uris(graph.get_frames()) == ['urn:frame1', 'urn:frame2']
+
+
+def test_search_frames_keeps_linked_frames_of_type(graph):
+    graph.add_frame(make_node(KGFrame, 'urn:frame1', 'Biography'))
+    # a frame linked to an entity only, and an entity sharing the name
+    lincoln = make_node(KGEntity, 'urn:lincoln', 'Biography')
+    graph.add_entity(lincoln)
+    graph.graph.add_objects([
+        make_node(KGFrame, 'urn:frame2', 'Biography'),
+        make_edge(Edge_hasEntityKGFrame, 'urn:edge2', 'urn:lincoln', 'urn:frame2'),
+    ])
+    graph.clear_cache()
+
+    assert match_uris(graph.search_frames('Biography')) == [{'frame': 'urn:frame1'}]
+    assert match_uris(graph.search_entity_frames('urn:lincoln', 'Biography')) == [{'frame': 'urn:frame2'}]
@@ -0,0 +1,98 @@
+import gc
+
+import pytest
+
+pytest.importorskip('SPARQLWrapper')
+pytest.importorskip('ai_haley_kg_domain')
+
+from ai_haley_kg_domain.model.KGInteraction import KGInteraction
+
+from kgraphmemory.kgraph_memory import KGraphMemory
+
+
+@pytest.fixture
+def memory():
+    # KGraphMemory is a singleton, start each test with a new instance
+    KGraphMemory._instance = None
+    yield KGraphMemory()
+    KGraphMemory._instance = None
+
+
+def create_graph(memory, graph_uri):
+    interaction = KGInteraction()
+    interaction.URI = graph_uri
+    return memory.create_interaction_graph(interaction)
+
+
+def test_unbounded_by_default(memory):
+    for i in range(5):
+        create_graph(memory, f'urn:graph{i}')
+    gc.collect()
+    for i in range(5):
+        assert f'urn:graph{i}' in memory
+
+
+def test_eviction_order(memory):
+    memory.set_max_graphs(2)
+    create_graph(memory, 'urn:a')
+    create_graph(memory, 'urn:b')
+    memory.get_interaction_graph('urn:a')
+    create_graph(memory, 'urn:c')
+    gc.collect()
+    assert 'urn:a' in memory
+    assert 'urn:b' not in memory
+    assert 'urn:c' in memory
+    with pytest.raises(KeyError):
+        memory.get_interaction_graph('urn:b')
+
+
+def test_set_max_graphs_evicts_existing(memory):
+    for i in range(3):
+        create_graph(memory, f'urn:graph{i}')
+    memory.set_max_graphs(1)
+    gc.collect()
+    assert [memory.has_interaction_graph(f'urn:graph{i}') for i in range(3)] == [False, False, True]
+
+
+def test_held_evicted_graph_is_fetched_back(memory):
+    memory.set_max_graphs(1)
+    graph_a = create_graph(memory, 'urn:a')
+    create_graph(memory, 'urn:b')
+    gc.collect()
+    assert 'urn:a' in memory
+    assert memory.get_interaction_graph('urn:a') is graph_a
+
+
+def test_recreate_then_remove(memory):
+    memory.set_max_graphs(1)
+    old_graph_a = create_graph(memory, 'urn:a')
+    create_graph(memory, 'urn:b')
+    new_graph_a = create_graph(memory, 'urn:a')
+    assert memory.get_interaction_graph('urn:a') is new_graph_a
+    assert memory.remove_interaction_graph('urn:a') is new_graph_a
+    assert old_graph_a is not None
+    assert 'urn:a' not in memory
+    with pytest.raises(KeyError):
+        memory.get_interaction_graph('urn:a')
+    with pytest.raises(KeyError):
+        memory.remove_interaction_graph('urn:a')
+
+
+def test_set_max_graphs_none_removes_limit(memory):
+    memory.set_max_graphs(1)
+    memory.set_max_graphs(None)
+    for i in range(3):
+        create_graph(memory, f'urn:graph{i}')
+    gc.collect()
+    for i in range(3):
+        assert f'urn:graph{i}' in memory
+
+
+def test_accessors_accept_uri_value(memory):
+    interaction = KGInteraction()
+    interaction.URI = 'urn:a'
+    graph = memory.create_interaction_graph(interaction)
+    assert interaction.URI in memory
+    assert memory.has_interaction_graph(interaction.URI)
+    assert memory.get_interaction_graph(interaction.URI) is graph
+    assert memory.remove_interaction_graph(interaction.URI) is graph
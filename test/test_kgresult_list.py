@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip('vital_ai_vitalsigns')
+
+from kgraphmemory.kgresult_list import KGResultList
+from kgraphmemory.kgresult_match import KGResultMatch
+
+
+def make_result_list(scores):
+    result_list = KGResultList()
+    for score in scores:
+        result_list.add_result(KGResultMatch(score))
+    return result_list
+
+
+def test_get_top_results_merged_lists():
+    merged = KGResultList()
+    merged.extend(make_result_list([0.9, 0.4, 0.1]))
+    merged.extend(make_result_list([0.8, 0.5]))
+
+    top_list = merged.get_top_results(3)
+
+    assert isinstance(top_list, KGResultList)
+    assert [result.score for result in top_list] == [0.9, 0.8, 0.5]
+    assert len(merged) == 5
+
+
+def test_get_top_results_k_larger_than_list():
+    top_list = make_result_list([0.2, 0.7]).get_top_results(5)
+    assert [result.score for result in top_list] == [0.7, 0.2]